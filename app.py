@@ -1,62 +1,218 @@
 import os
-import json # Ensure this is imported at the top
-import re   # Ensure this is imported for regex
-from flask import Flask, request, jsonify, render_template
+import asyncio
+import orjson # Rust-backed JSON; several times faster than the json module
+import hashlib
+from typing_extensions import TypedDict # typing.TypedDict is rejected by the SDK schema builder before Python 3.12
+from flask import Flask, Response, request, jsonify, render_template
+from flask_compress import Compress
+from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 import google.generativeai as genai # Back to Gemini
-import pypdf
+from google.generativeai.types import generation_types
+import pymupdf # PyMuPDF, C-backed PDF text extraction
 import docx2txt
+import zstandard as zstd
+import numpy as np
 import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # Load environment variables from .env file (e.g., GOOGLE_API_KEY)
 load_dotenv()
 
 app = Flask(__name__)
+# Compress JSON responses (gzip, brotli or zstd, per Accept-Encoding); candidate lists and
+# evaluation summaries shrink several-fold. Streamed responses such as /candidates skip gzip
+# by default, so it is enabled here for clients that only accept gzip.
+app.config['COMPRESS_ALGORITHM_STREAMING'] = ['zstd', 'br', 'gzip', 'deflate']
+Compress(app)
 
 # --- Configuration ---
 # Folder to store uploaded resumes
 app.config['UPLOAD_FOLDER'] = 'uploads'
 # Ensure the uploads folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Largest resume file accepted; uploads are streamed to disk and aborted past this size
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 64 * 1024
+# Whole-request cap, so oversized bodies get a 413 before Flask parses them;
+# leaves room for a /upload_bulk request carrying several maximum-size resumes
+MAX_BULK_UPLOAD_FILES = 20
+app.config['MAX_CONTENT_LENGTH'] = MAX_BULK_UPLOAD_FILES * MAX_UPLOAD_BYTES
 
 # Configure Google Gemini Pro API
 # The API key is loaded from the .env file
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# gRPC multiplexes every Gemini call over one long-lived HTTP/2 channel, so calls after the
+# first skip the TCP/TLS handshake
+genai.configure(api_key=os.getenv("GOOGLE_API_KEY"), transport="grpc")
 # Initialize the Generative Model with the correct model ID
 model = genai.GenerativeModel('gemini-1.5-flash') # Changed from 'gemini-pro' based on your list_models output
 
+# --- Gemini Response Schemas ---
+# Passed as response_schema so Gemini returns well-formed JSON in exactly this shape
+
+class Education(TypedDict):
+    degree: str
+    major: str
+    university: str
+    years: str
+
+class Experience(TypedDict):
+    title: str
+    company: str
+    years: str
+    description: str
+
+class Resume(TypedDict):
+    name: str
+    email: str
+    phone: str
+    linkedin: str
+    education: list[Education]
+    experience: list[Experience]
+    skills: list[str]
+    summary: str
+
+class Evaluation(TypedDict):
+    score: int # Match score out of 100
+    summary: str
+    strengths: list[str]
+    gaps: list[str]
+
+class ResumeEvaluation(TypedDict):
+    parsed: Resume
+    evaluation: Evaluation
+
+class BatchResumeEvaluation(TypedDict):
+    id: int # resume_id of the resume block this result belongs to
+    parsed: Resume
+    evaluation: Evaluation
+
+def json_generation_config(response_schema):
+    """
+    Builds a JSON-mode generation config with the schema already converted to Gemini's
+    protobuf Schema. Passing the TypedDict itself makes the SDK redo that conversion
+    (several ms) on every call, so each config is built once below and reused.
+    """
+    return generation_types.to_generation_config_dict(
+        genai.types.GenerationConfig(response_mime_type="application/json", response_schema=response_schema)
+    )
+
+EVALUATION_CONFIG = json_generation_config(Evaluation)
+RESUME_EVALUATION_CONFIG = json_generation_config(ResumeEvaluation)
+BATCH_RESUME_EVALUATION_CONFIG = json_generation_config(list[BatchResumeEvaluation])
+
 # --- Database Setup (SQLite for simplicity) ---
 DATABASE = 'ats.db'
 
+# One long-lived connection shared by all requests instead of reconnecting per request.
+# isolation_level=None (autocommit) lets db_transaction() control transactions explicitly.
+db_conn = sqlite3.connect(DATABASE, check_same_thread=False, isolation_level=None)
+db_conn.execute("PRAGMA journal_mode=WAL")       # Readers don't block on writers
+db_conn.execute("PRAGMA synchronous=NORMAL")     # Safe with WAL, avoids an fsync per commit
+db_conn.execute("PRAGMA temp_store=MEMORY")
+db_conn.execute("PRAGMA mmap_size=268435456")    # Map up to 256 MB of the DB file
+# Serializes use of the shared connection across Flask's request threads
+db_lock = threading.Lock()
+
+@contextmanager
+def db_transaction():
+    """Yields a cursor on the shared connection inside a BEGIN IMMEDIATE ... COMMIT transaction."""
+    with db_lock:
+        db_conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield db_conn.cursor()
+        except BaseException:
+            db_conn.execute("ROLLBACK")
+            raise
+        db_conn.execute("COMMIT")
+
+# Raw resume text is stored zstd-compressed; plain text compresses roughly 4-8x.
+# zstandard compressor/decompressor objects aren't thread-safe, so each call makes its own.
+TEXT_COMPRESSION_LEVEL = 6
+
+def compress_text(text):
+    """Compresses resume text for storage in resumes.text_content."""
+    return zstd.ZstdCompressor(level=TEXT_COMPRESSION_LEVEL).compress(text.encode('utf-8'))
+
+def decompress_text(blob):
+    """Restores resume text stored by compress_text()."""
+    return zstd.ZstdDecompressor().decompress(blob).decode('utf-8')
+
 def init_db():
     """Initializes the SQLite database and creates the 'resumes' table if it doesn't exist."""
-    with sqlite3.connect(DATABASE) as conn:
-        cursor = conn.cursor()
+    with db_transaction() as cursor:
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS resumes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 filename TEXT NOT NULL,
-                text_content TEXT NOT NULL,
-                parsed_data TEXT, -- JSON string of parsed data from Gemini
+                text_content BLOB NOT NULL, -- zstd-compressed raw resume text
+                parsed_data TEXT, -- JSON string of parsed data from Gemini (written with orjson)
                 score REAL,        -- Numerical match score
-                job_match_summary TEXT -- Full evaluation summary from Gemini
+                job_match_summary TEXT, -- Full evaluation summary from Gemini
+                name TEXT,         -- Candidate name, copied out of parsed_data for list views
+                email TEXT,        -- Candidate email, copied out of parsed_data for list views
+                embedding BLOB     -- Unit-length float32 Gemini embedding of the resume text
+            )
+        ''')
+        # Databases created before the name/email columns existed: add them and backfill
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(resumes)")}
+        if 'name' not in columns:
+            cursor.execute("ALTER TABLE resumes ADD COLUMN name TEXT")
+            cursor.execute("ALTER TABLE resumes ADD COLUMN email TEXT")
+            cursor.execute(
+                "UPDATE resumes SET name = json_extract(parsed_data, '$.name'), "
+                "email = json_extract(parsed_data, '$.email') WHERE parsed_data IS NOT NULL"
+            )
+        # Databases created before embeddings existed; /rank fills these in on first use
+        if 'embedding' not in columns:
+            cursor.execute("ALTER TABLE resumes ADD COLUMN embedding BLOB")
+        # Gemini parse results keyed by SHA-256 of the resume text, so re-evaluating the same
+        # resume against another job description doesn't pay for parsing it again
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                text_hash TEXT PRIMARY KEY,
+                parsed_json TEXT NOT NULL
             )
         ''')
-        conn.commit()
+        # Rows stored before text_content was compressed: compress them in place
+        cursor.execute("SELECT id, text_content FROM resumes WHERE typeof(text_content) = 'text'")
+        cursor.executemany(
+            "UPDATE resumes SET text_content = ? WHERE id = ?",
+            [(compress_text(text_content), resume_id) for resume_id, text_content in cursor.fetchall()]
+        )
+        # Lets /candidates read rows already in score order instead of sorting the table per request
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_resumes_score ON resumes(score DESC)")
 
 # Initialize the database when the application starts
 init_db()
 
+def connect_read_only():
+    """Opens a read-only connection to the database, for SELECT-only paths."""
+    conn = sqlite3.connect(f'file:{DATABASE}?mode=ro', uri=True, check_same_thread=False)
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+# Separate read-only connection for short SELECT-only lookups (opened after init_db so the file exists).
+# With WAL, each query here sees the last committed state without waiting on db_conn's writers or db_lock.
+# A statement left open would pin its snapshot for every reader, so long-running reads such as
+# the /candidates stream open their own connection instead.
+db_read_conn = connect_read_only()
+db_read_lock = threading.Lock()
+
 # --- Helper Functions for Resume Text Extraction ---
 
 def extract_text_from_pdf(pdf_path):
-    """Extracts text from a PDF file."""
+    """Extracts text from a PDF file using PyMuPDF."""
     text = ""
     try:
-        with open(pdf_path, 'rb') as file:
-            reader = pypdf.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() or "" # Use .extract_text() and handle None
+        with pymupdf.open(pdf_path) as doc:
+            # Pages are loaded one at a time while iterating the document
+            text = "\n".join(page.get_text("text") for page in doc)
     except Exception as e:
         print(f"Error extracting text from PDF {pdf_path}: {e}")
     return text
@@ -70,99 +226,512 @@ def extract_text_from_docx(docx_path):
         print(f"Error extracting text from DOCX {docx_path}: {e}")
     return text
 
+# Leading bytes of each supported resume format (DOCX files are ZIP archives)
+RESUME_MAGIC_BYTES = {
+    b'%PDF-': 'pdf',
+    b'PK\x03\x04': 'docx',
+}
+
+def save_resume_upload(file):
+    """
+    Detects an uploaded resume's type from its magic bytes and streams it into the
+    uploads folder in chunks, giving up once it exceeds MAX_UPLOAD_BYTES.
+    The file is stored under a unique, sanitized name so uploads with the same
+    filename never overwrite each other; the original name is only kept in the DB.
+    Returns (filepath, file_type); raises ValueError if the upload is rejected.
+    """
+    header = file.stream.read(8)
+    file_type = next((kind for magic, kind in RESUME_MAGIC_BYTES.items() if header.startswith(magic)), None)
+    if file_type is None:
+        raise ValueError('Unsupported file type. Please upload PDF or DOCX.')
+
+    stored_name = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], stored_name)
+    size = len(header)
+    with open(filepath, 'wb') as out:
+        out.write(header)
+        while chunk := file.stream.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                break
+            out.write(chunk)
+    if size > MAX_UPLOAD_BYTES:
+        os.remove(filepath) # Clean up the partial file
+        raise ValueError(f'File is too large. The maximum size is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.')
+    return filepath, file_type
+
+def extract_resume_text(filepath, file_type):
+    """Extracts text from a saved resume of the given type ('pdf' or 'docx')."""
+    if file_type == 'pdf':
+        return extract_text_from_pdf(filepath)
+    return extract_text_from_docx(filepath)
+
 # --- Gemini Pro Interaction Functions ---
 
-def parse_resume_with_gemini(resume_text):
+# Gemini latency and cost grow with input tokens; longer resumes are cut down before sending
+MAX_RESUME_TOKENS = 8000
+TRUNCATED_RESUME_TOKENS = 6000
+
+def truncate_resume_text(resume_text):
     """
-    Sends raw resume text to Gemini Pro for structured data extraction.
-    Asks Gemini to return data in a specific JSON format.
-    Handles potential markdown wrapping of JSON using regex for robustness.
-    Returns a Python dictionary, or None if parsing fails.
+    Keeps the first ~TRUNCATED_RESUME_TOKENS tokens of a resume longer than MAX_RESUME_TOKENS.
+    Tokens are counted with Gemini's own tokenizer via count_tokens, which is only called for
+    texts longer than MAX_RESUME_TOKENS characters (a token is at least one character).
+    """
+    if len(resume_text) <= MAX_RESUME_TOKENS:
+        return resume_text
+    try:
+        token_count = model.count_tokens(resume_text).total_tokens
+    except Exception as e:
+        print(f"Error counting resume tokens with Gemini, estimating instead: {e}")
+        token_count = len(resume_text) // 4 # Rough average of characters per token
+    return cut_resume_text(resume_text, token_count)
+
+async def truncate_resume_text_async(resume_text):
+    """Async variant of truncate_resume_text, so batch jobs can count tokens for many resumes concurrently."""
+    if len(resume_text) <= MAX_RESUME_TOKENS:
+        return resume_text
+    try:
+        token_count = (await model.count_tokens_async(resume_text)).total_tokens
+    except Exception as e:
+        print(f"Error counting resume tokens with Gemini, estimating instead: {e}")
+        token_count = len(resume_text) // 4 # Rough average of characters per token
+    return cut_resume_text(resume_text, token_count)
+
+def cut_resume_text(resume_text, token_count):
+    """Cuts a resume of token_count tokens down to about TRUNCATED_RESUME_TOKENS, if it is over MAX_RESUME_TOKENS."""
+    if token_count <= MAX_RESUME_TOKENS:
+        return resume_text
+
+    cut = len(resume_text) * TRUNCATED_RESUME_TOKENS // token_count
+    # Prefer ending on a line break so the last kept line isn't cut mid-sentence
+    line_end = resume_text.rfind('\n', 0, cut)
+    if line_end > cut // 2:
+        cut = line_end
+    return resume_text[:cut] + "\n…"
+
+def resume_text_hash(resume_text):
+    """Returns the parse cache key for a resume's text."""
+    return hashlib.sha256(resume_text.encode('utf-8')).hexdigest()
+
+def get_cached_parse(resume_text):
+    """Returns the cached parse for this exact resume text, or None if it hasn't been parsed yet."""
+    text_hash = resume_text_hash(resume_text)
+    with db_read_lock:
+        cursor = db_read_conn.cursor()
+        cursor.execute("SELECT parsed_json FROM parse_cache WHERE text_hash = ?", (text_hash,))
+        result = cursor.fetchone()
+    return orjson.loads(result[0]) if result else None
+
+def cache_parse(resume_text, parsed_data):
+    """Stores a successful Gemini parse of this resume text in the parse cache."""
+    with db_transaction() as cursor:
+        cursor.execute(
+            "INSERT OR REPLACE INTO parse_cache (text_hash, parsed_json) VALUES (?, ?)",
+            (resume_text_hash(resume_text), orjson.dumps(parsed_data).decode())
+        )
+
+def evaluate_candidate_with_gemini(job_description, resume_text):
+    """
+    Sends job description and raw resume text to Gemini Pro for evaluation only.
+    Used when the resume's parse is already cached, so Gemini doesn't regenerate it.
+    Returns a dictionary matching the Evaluation schema, or None if the call fails.
     """
     prompt = f"""
-    Analyze the following resume text and extract the following information in a JSON format.
-    If a field is not found, use "N/A" for strings, empty array for lists, or appropriate default.
-    Make sure the JSON is well-formed and directly parsable.
+    Job Description:
+    {job_description}
 
     Resume Text:
     {resume_text}
 
-    Expected JSON format:
-    {{
-        "name": "string",
-        "email": "string",
-        "phone": "string",
-        "linkedin": "string",
-        "education": [
-            {{"degree": "string", "major": "string", "university": "string", "years": "string"}}
-        ],
-        "experience": [
-            {{"title": "string", "company": "string", "years": "string", "description": "string"}}
-        ],
-        "skills": ["skill1", "skill2", ...],
-        "summary": "string"
-    }}
+    Based on the Job Description and the candidate's resume, provide:
+    1. "score": a match score out of 100.
+    2. "summary": a brief summary of why this candidate is a good fit.
+    3. "strengths": key strengths directly relevant to the job.
+    4. "gaps": key gaps or areas where the candidate might not fully meet the requirements.
     """
     try:
-        response = model.generate_content(prompt)
-        json_str = response.candidates[0].content.parts[0].text
-
-        # --- MORE ROBUST JSON EXTRACTION USING REGEX ---
-        # This regex looks for the content specifically inside ```json ... ``` blocks
-        # re.DOTALL makes '.' match newlines, so it can capture multiline JSON
-        match = re.search(r'```json\s*(.*?)\s*```', json_str, re.DOTALL)
-        if match:
-            cleaned_json_str = match.group(1).strip() # Extract content and strip whitespace
-        else:
-            # Fallback: if no markdown block is found, assume the entire string is JSON.
-            # This is less common for Gemini, but a safeguard.
-            cleaned_json_str = json_str.strip()
+        response = model.generate_content(prompt, generation_config=EVALUATION_CONFIG)
+        return orjson.loads(response.text)
+    except Exception as e:
+        print(f"Error calling Gemini for evaluation: {e}")
+        return None
 
-        # Debug print: See what's actually being fed to json.loads()
-        print(f"DEBUG: Cleaned JSON string before loads():\n{cleaned_json_str[:500]}...") # Print first 500 chars
+# Gemini embedding model used to shortlist resumes for /rank before any LLM evaluation
+EMBEDDING_MODEL = 'models/text-embedding-004'
+# The embedding model only reads ~2048 tokens, so just the start of a resume is sent
+EMBEDDING_MAX_CHARS = 8000
+# Most texts embed_content accepts in a single batch request
+EMBEDDING_BATCH_SIZE = 100
 
-        # Parse the cleaned JSON string into a Python dictionary
-        parsed_data = json.loads(cleaned_json_str)
-        return parsed_data # Return the dictionary
+def embed_texts_with_gemini(texts, task_type):
+    """
+    Embeds texts with Gemini, sending up to EMBEDDING_BATCH_SIZE texts per request.
+    task_type is 'retrieval_document' for resumes and 'retrieval_query' for job descriptions.
+    Returns a (len(texts), dim) float32 array with unit-length rows, so dot products are
+    cosine similarities, or None if the call fails.
+    """
+    try:
+        embeddings = []
+        for i in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            batch = [text[:EMBEDDING_MAX_CHARS] for text in texts[i:i + EMBEDDING_BATCH_SIZE]]
+            result = genai.embed_content(model=EMBEDDING_MODEL, content=batch, task_type=task_type)
+            embeddings.extend(result['embedding'])
     except Exception as e:
-        print(f"Error calling Gemini for parsing: {e}")
-        # Print raw response for debugging if parsing failed unexpectedly
-        if 'response' in locals() and hasattr(response, 'candidates') and response.candidates:
-            print(f"Raw Gemini response that caused error: {response.candidates[0].content.parts[0].text}")
+        print(f"Error calling Gemini for embeddings: {e}")
         return None
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
 
-def evaluate_candidate_with_gemini(job_description, resume_summary, skills):
+def parse_and_evaluate_with_gemini(resume_text, job_description):
     """
-    Sends job description and extracted candidate info to Gemini Pro for evaluation.
-    Asks Gemini to provide a score and a detailed match summary.
+    Parses a resume and evaluates it against a job description in a single Gemini call.
+    Saves a round-trip over a separate parsing call followed by evaluate_candidate_with_gemini.
+    Returns a dictionary with 'parsed' and 'evaluation' keys, or None if the call fails.
     """
     prompt = f"""
+    Analyze the following resume text, extract the candidate's information, and evaluate
+    the candidate against the job description. Respond with a single JSON object.
+    If a field is not found, use "N/A" for strings, empty array for lists, or appropriate default.
+
     Job Description:
     {job_description}
 
-    Candidate Summary (from resume):
-    {resume_summary}
+    Resume Text:
+    {resume_text}
+
+    Expected JSON format:
+    {{
+        "parsed": {{
+            "name": "string",
+            "email": "string",
+            "phone": "string",
+            "linkedin": "string",
+            "education": [
+                {{"degree": "string", "major": "string", "university": "string", "years": "string"}}
+            ],
+            "experience": [
+                {{"title": "string", "company": "string", "years": "string", "description": "string"}}
+            ],
+            "skills": ["skill1", "skill2", ...],
+            "summary": "string"
+        }},
+        "evaluation": {{
+            "score": integer match score out of 100,
+            "summary": "brief summary of why this candidate is a good fit",
+            "strengths": ["key strength directly relevant to the job", ...],
+            "gaps": ["key gap where the candidate might not fully meet the requirements", ...]
+        }}
+    }}
+    """
+    try:
+        # JSON response mode returns a bare JSON payload, no markdown fences to strip
+        response = model.generate_content(prompt, generation_config=RESUME_EVALUATION_CONFIG)
+        return orjson.loads(response.text)
+    except Exception as e:
+        print(f"Error calling Gemini for parsing and evaluation: {e}")
+        return None
 
-    Candidate Skills:
-    {', '.join(skills) if skills else 'None'}
+async def parse_and_evaluate_batch_with_gemini(resumes, job_description):
+    """
+    Parses and evaluates several resumes against one job description in a single Gemini call.
+    `resumes` is a list of (resume_id, resume_text) tuples; the job description and the
+    per-call overhead are shared across all of them instead of paid once per resume.
+    Long resumes are truncated first, with their token counts fetched concurrently.
+    Returns a list of dictionaries with 'id', 'parsed' and 'evaluation' keys, or None if the call fails.
+    """
+    prompt_texts = await asyncio.gather(*(truncate_resume_text_async(resume_text) for _, resume_text in resumes))
+    resume_blocks = "\n\n".join(
+        f"--- Resume id={resume_id} ---\n{prompt_text}" for (resume_id, _), prompt_text in zip(resumes, prompt_texts)
+    )
+    prompt = f"""
+    Analyze each of the following resumes, extract the candidate's information, and evaluate
+    the candidate against the job description. Respond with a JSON array containing exactly
+    one object per resume, using the id given in that resume's header.
+    If a field is not found, use "N/A" for strings, empty array for lists, or appropriate default.
+    The evaluation score is an integer match score out of 100, the summary briefly explains the fit,
+    strengths lists key strengths relevant to the job, and gaps lists requirements the candidate may not meet.
 
-    Based on the Job Description and Candidate information, provide:
-    1. A match score out of 100 (e.g., "Score: 85/100").
-    2. A brief summary of why this candidate is a good fit.
-    3. Key strengths directly relevant to the job.
-    4. Key gaps or areas where the candidate might not fully meet the requirements.
+    Job Description:
+    {job_description}
 
-    Format your response clearly, starting with the score line.
+    Resumes:
+    {resume_blocks}
     """
     try:
-        response = model.generate_content(prompt)
-        return response.candidates[0].content.parts[0].text
+        response = await model.generate_content_async(prompt, generation_config=BATCH_RESUME_EVALUATION_CONFIG)
+        return orjson.loads(response.text)
     except Exception as e:
-        print(f"Error calling Gemini for evaluation: {e}")
-        return "Evaluation failed: Could not get a response from Gemini."
+        print(f"Error calling Gemini for batch parsing and evaluation: {e}")
+        return None
+
+def format_evaluation(evaluation):
+    """Renders a structured evaluation as the plain-text match summary stored in the database."""
+    strengths = '\n'.join(f"- {item}" for item in evaluation.get('strengths', [])) or '- None'
+    gaps = '\n'.join(f"- {item}" for item in evaluation.get('gaps', [])) or '- None'
+    return (
+        f"Score: {evaluation.get('score', 0)}/100\n\n"
+        f"{evaluation.get('summary', 'N/A')}\n\n"
+        f"Key Strengths:\n{strengths}\n\n"
+        f"Key Gaps:\n{gaps}"
+    )
+
+# --- Async Gemini Event Loop ---
+# Concurrent Gemini calls run as coroutines on this single long-lived loop. The SDK caches
+# its async gRPC client, which only works on the loop it was created on, so worker threads
+# submit coroutines here rather than each starting their own loop with asyncio.run().
+gemini_loop = asyncio.new_event_loop()
+threading.Thread(target=gemini_loop.run_forever, daemon=True).start()
+
+def run_on_gemini_loop(coro):
+    """Runs a coroutine on the shared Gemini event loop and blocks until it completes."""
+    return asyncio.run_coroutine_threadsafe(coro, gemini_loop).result()
+
+# --- Background Jobs ---
+# Gemini calls take seconds, so the processing routes hand them to this pool and return
+# immediately instead of holding a request thread for the whole call.
+executor = ThreadPoolExecutor(max_workers=4)
+# job_id -> {'status': 'queued'|'running'|'finished'|'failed', 'result': ..., 'error': ...}
+jobs = {}
+jobs_lock = threading.Lock()
+# job_id -> time.monotonic() when it finished or failed, oldest first. Results are kept for
+# clients to poll, then evicted after JOB_RESULT_TTL_SECONDS or past MAX_FINISHED_JOBS.
+finished_jobs = OrderedDict()
+JOB_RESULT_TTL_SECONDS = 60 * 60
+MAX_FINISHED_JOBS = 1000
+# Resumes packed into one Gemini prompt; larger requests are split into concurrent calls
+RESUMES_PER_GEMINI_CALL = 10
+# Most of a job's batch calls in flight at once, so large requests don't trip Gemini rate limits
+MAX_CONCURRENT_GEMINI_BATCHES = 4
+# Largest shortlist /rank will evaluate, and how many of those evaluations run at once
+MAX_RANK_TOP_K = 50
+RANK_EVALUATION_WORKERS = 8
+
+def submit_job(func, *args):
+    """Runs func(*args) on the background pool and returns the ID to poll via /job/<job_id>."""
+    job_id = uuid.uuid4().hex
+    with jobs_lock:
+        evict_finished_jobs()
+        jobs[job_id] = {'status': 'queued'}
+    executor.submit(run_job, job_id, func, *args)
+    return job_id
+
+def run_job(job_id, func, *args):
+    """Executes a queued job, recording its result or error in the jobs table."""
+    with jobs_lock:
+        jobs[job_id]['status'] = 'running'
+    try:
+        result = func(*args)
+    except Exception as e:
+        print(f"Error in background job {job_id}: {e}")
+        outcome = {'status': 'failed', 'error': str(e)}
+    else:
+        outcome = {'status': 'finished', 'result': result}
+    with jobs_lock:
+        jobs[job_id] = outcome
+        finished_jobs[job_id] = time.monotonic()
+        evict_finished_jobs()
+
+def evict_finished_jobs():
+    """Drops expired finished jobs, and the oldest ones past MAX_FINISHED_JOBS. Caller must hold jobs_lock."""
+    now = time.monotonic()
+    while finished_jobs:
+        job_id, finished_at = next(iter(finished_jobs.items()))
+        if now - finished_at < JOB_RESULT_TTL_SECONDS and len(finished_jobs) <= MAX_FINISHED_JOBS:
+            break
+        finished_jobs.popitem(last=False)
+        jobs.pop(job_id, None)
+
+def process_resume_job(resume_id, resume_text, job_description):
+    """
+    Parses and evaluates one resume with Gemini and stores parsed data, score,
+    and evaluation summary in the database.
+    """
+    prompt_text = truncate_resume_text(resume_text)
+    parsed_data = get_cached_parse(resume_text)
+    if parsed_data is not None:
+        # --- Resume already parsed: only ask Gemini for the evaluation ---
+        evaluation = evaluate_candidate_with_gemini(job_description, prompt_text)
+        if evaluation is None:
+            raise RuntimeError('Failed to evaluate resume with Gemini. Check API key, model availability, or response format.')
+    else:
+        # --- Parse and Evaluate Resume with a single Gemini call ---
+        result = parse_and_evaluate_with_gemini(prompt_text, job_description)
+        if result is None:
+            raise RuntimeError('Failed to parse resume with Gemini. Check API key, model availability, or response format.')
+        parsed_data = result.get('parsed', {})
+        evaluation = result.get('evaluation', {})
+        cache_parse(resume_text, parsed_data)
+
+    score = float(evaluation.get('score', 0.0))
+    evaluation_result = format_evaluation(evaluation)
+
+    # Update database with parsed data, score, and full evaluation summary
+    with db_transaction() as cursor:
+        cursor.execute(
+            "UPDATE resumes SET parsed_data = ?, score = ?, job_match_summary = ?, name = ?, email = ? WHERE id = ?",
+            (orjson.dumps(parsed_data).decode(), score, evaluation_result,
+             parsed_data.get('name'), parsed_data.get('email'), resume_id)
+        )
+
+    return {
+        'message': 'Resume processed and evaluated successfully!',
+        'resume_id': resume_id,
+        'parsed_data': parsed_data,
+        'evaluation': evaluation_result,
+        'score': score
+    }
+
+def process_resumes_job(resume_ids, resumes, job_description):
+    """
+    Parses and evaluates several resumes with batched Gemini calls and stores
+    every result in the database. Up to MAX_CONCURRENT_GEMINI_BATCHES batches are sent
+    at once, so large uploads take a fraction of the sum of all the calls.
+    """
+    batches = [resumes[i:i + RESUMES_PER_GEMINI_CALL] for i in range(0, len(resumes), RESUMES_PER_GEMINI_CALL)]
+
+    async def evaluate_batches():
+        # Created here rather than at import so it belongs to the Gemini loop
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_GEMINI_BATCHES)
+
+        async def evaluate_batch(batch):
+            async with semaphore:
+                return await parse_and_evaluate_batch_with_gemini(batch, job_description)
+
+        return await asyncio.gather(*(evaluate_batch(batch) for batch in batches))
+
+    # --- Parse and Evaluate all Resumes, one Gemini call per batch, a few at a time ---
+    batch_results = [results for results in run_on_gemini_loop(evaluate_batches()) if results is not None]
+    if not batch_results:
+        raise RuntimeError('Failed to process resumes with Gemini. Check API key, model availability, or response format.')
+
+    processed = []
+    for result in (result for results in batch_results for result in results):
+        if result.get('id') not in resume_ids:
+            continue # Ignore results that don't map back to a requested resume
+        parsed_data = result.get('parsed', {})
+        evaluation = result.get('evaluation', {})
+        processed.append({
+            'resume_id': result['id'],
+            'parsed_data': parsed_data,
+            'evaluation': format_evaluation(evaluation),
+            'score': float(evaluation.get('score', 0.0))
+        })
+
+    # Update database with all results at once
+    with db_transaction() as cursor:
+        cursor.executemany(
+            "UPDATE resumes SET parsed_data = ?, score = ?, job_match_summary = ?, name = ?, email = ? WHERE id = ?",
+            [(orjson.dumps(item['parsed_data']).decode(), item['score'], item['evaluation'],
+              item['parsed_data'].get('name'), item['parsed_data'].get('email'), item['resume_id'])
+             for item in processed]
+        )
+        resume_texts = dict(resumes)
+        cursor.executemany(
+            "INSERT OR REPLACE INTO parse_cache (text_hash, parsed_json) VALUES (?, ?)",
+            [(resume_text_hash(resume_texts[item['resume_id']]), orjson.dumps(item['parsed_data']).decode())
+             for item in processed]
+        )
+
+    return {
+        'message': f'{len(processed)} of {len(resume_ids)} resumes processed and evaluated successfully!',
+        'results': processed
+    }
+
+def embed_resumes(resume_ids, texts):
+    """
+    Embeds stored resumes so /rank can shortlist them without an LLM call. Uploads queue this
+    on the background pool after inserting their rows; if it fails, the rows keep a NULL
+    embedding and rank_candidates_job backfills them.
+    """
+    embeddings = embed_texts_with_gemini(texts, 'retrieval_document')
+    if embeddings is None:
+        return
+    with db_transaction() as cursor:
+        cursor.executemany(
+            "UPDATE resumes SET embedding = ? WHERE id = ?",
+            [(embedding.tobytes(), resume_id) for resume_id, embedding in zip(resume_ids, embeddings)]
+        )
+
+def rank_candidates_job(job_description, top_k):
+    """
+    Ranks all resumes by cosine similarity between their embeddings and the job description's,
+    then evaluates only the top_k closest with Gemini and stores their scores. This replaces
+    one LLM call per resume with cheap embeddings plus top_k LLM calls.
+    """
+    # Embed resumes stored before embeddings existed, or whose upload-time embedding failed
+    with db_read_lock:
+        cursor = db_read_conn.cursor()
+        cursor.execute("SELECT id, text_content FROM resumes WHERE embedding IS NULL")
+        unembedded = cursor.fetchall()
+    if unembedded:
+        embed_resumes([resume_id for resume_id, _ in unembedded], [decompress_text(blob) for _, blob in unembedded])
+
+    job_embedding = embed_texts_with_gemini([job_description], 'retrieval_query')
+    if job_embedding is None:
+        raise RuntimeError('Failed to embed job description with Gemini. Check API key or model availability.')
+
+    with db_read_lock:
+        cursor = db_read_conn.cursor()
+        cursor.execute("SELECT id, embedding FROM resumes WHERE embedding IS NOT NULL")
+        rows = cursor.fetchall()
+    if not rows:
+        raise RuntimeError('No resumes with embeddings to rank.')
+
+    # Stack every resume embedding into one (N, dim) matrix and score them all in a single product
+    resume_ids = [resume_id for resume_id, _ in rows]
+    matrix = np.frombuffer(b''.join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), -1)
+    similarities = matrix @ job_embedding[0]
+    k = min(top_k, len(rows))
+    top = np.argpartition(-similarities, k - 1)[:k]
+    top = top[np.argsort(-similarities[top])]
+    shortlist = {resume_ids[i]: float(similarities[i]) for i in top}
+
+    placeholders = ', '.join('?' for _ in shortlist)
+    with db_read_lock:
+        cursor = db_read_conn.cursor()
+        cursor.execute(f"SELECT id, filename, text_content FROM resumes WHERE id IN ({placeholders})", list(shortlist))
+        shortlisted = cursor.fetchall()
+
+    # --- Evaluate only the shortlisted Resumes, concurrently ---
+    def evaluate(row):
+        _, _, blob = row
+        return evaluate_candidate_with_gemini(job_description, truncate_resume_text(decompress_text(blob)))
+
+    with ThreadPoolExecutor(max_workers=min(len(shortlisted), RANK_EVALUATION_WORKERS)) as pool:
+        evaluations = list(pool.map(evaluate, shortlisted))
+
+    ranked = []
+    for (resume_id, filename, _), evaluation in zip(shortlisted, evaluations):
+        if evaluation is None:
+            continue # Leave the stored score untouched if Gemini failed for this resume
+        ranked.append({
+            'resume_id': resume_id,
+            'filename': filename,
+            'similarity': shortlist[resume_id],
+            'evaluation': format_evaluation(evaluation),
+            'score': float(evaluation.get('score', 0.0))
+        })
+    ranked.sort(key=lambda item: item['score'], reverse=True)
+
+    with db_transaction() as cursor:
+        cursor.executemany(
+            "UPDATE resumes SET score = ?, job_match_summary = ? WHERE id = ?",
+            [(item['score'], item['evaluation'], item['resume_id']) for item in ranked]
+        )
+
+    return {
+        'message': f'Top {len(ranked)} of {len(rows)} resumes shortlisted and evaluated successfully!',
+        'results': ranked
+    }
 
 # --- Flask Routes ---
 
+@app.errorhandler(413)
+def request_too_large(e):
+    """Reports a body over MAX_CONTENT_LENGTH as JSON, like the other upload errors."""
+    return jsonify({'error': f"Request is too large. The maximum size is {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB."}), 413
+
 @app.route('/')
 def index():
     """Renders the main HTML page."""
@@ -183,126 +752,232 @@ def upload_resume():
 
     if file:
         filename = file.filename
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-
-        text_content = ""
-        if filename.lower().endswith('.pdf'):
-            text_content = extract_text_from_pdf(filepath)
-        elif filename.lower().endswith('.docx'):
-            text_content = extract_text_from_docx(filepath)
-        else:
-            os.remove(filepath) # Clean up unsupported file
-            return jsonify({'error': 'Unsupported file type. Please upload PDF or DOCX.'}), 400
+        try:
+            filepath, file_type = save_resume_upload(file)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        text_content = extract_resume_text(filepath, file_type)
 
         if not text_content.strip(): # Check if extracted text is empty or just whitespace
             os.remove(filepath) # Clean up file if text extraction failed
             return jsonify({'error': 'Could not extract readable text from the resume. Please check the file content.'}), 500
 
         # Store raw content in DB
-        with sqlite3.connect(DATABASE) as conn:
-            cursor = conn.cursor()
+        with db_transaction() as cursor:
             cursor.execute(
                 "INSERT INTO resumes (filename, text_content) VALUES (?, ?)",
-                (filename, text_content)
+                (filename, compress_text(text_content))
             )
-            conn.commit()
             resume_id = cursor.lastrowid # Get the ID of the newly inserted resume
 
+        # Embed in the background so a slow Gemini call doesn't hold up the upload
+        executor.submit(embed_resumes, [resume_id], [text_content])
+
         return jsonify({
             'message': 'Resume uploaded and text extracted successfully!',
             'resume_id': resume_id,
             'filename': filename
         }), 200
 
+@app.route('/upload_bulk', methods=['POST'])
+def upload_resumes_bulk():
+    """
+    Handles uploads of several resume files at once (form field 'resumes').
+    Text is extracted from the files in parallel, and all resumes are stored in a
+    single database transaction rather than one commit per file.
+    """
+    files = [file for file in request.files.getlist('resumes') if file.filename]
+    if not files:
+        return jsonify({'error': 'No files selected.'}), 400
+
+    uploaded, rejected, accepted = [], [], []
+    saved = [] # (filename, filepath, file_type) of files that passed validation
+    for file in files:
+        try:
+            saved.append((file.filename, *save_resume_upload(file)))
+        except ValueError as e:
+            rejected.append({'filename': file.filename, 'error': str(e)})
+
+    with ThreadPoolExecutor() as pool:
+        text_contents = list(pool.map(lambda item: extract_resume_text(item[1], item[2]), saved))
+
+    for (filename, filepath, _), text_content in zip(saved, text_contents):
+        if not text_content.strip():
+            os.remove(filepath) # Clean up file if text extraction failed
+            rejected.append({'filename': filename, 'error': 'Could not extract readable text from the resume.'})
+        else:
+            accepted.append((filename, text_content))
+
+    # Store all resumes in one transaction; rows are inserted one by one to collect their IDs
+    with db_transaction() as cursor:
+        for filename, text_content in accepted:
+            cursor.execute(
+                "INSERT INTO resumes (filename, text_content) VALUES (?, ?)",
+                (filename, compress_text(text_content))
+            )
+            uploaded.append({'resume_id': cursor.lastrowid, 'filename': filename})
+
+    # Embed all accepted resumes in one batched background request so /rank can shortlist them later
+    if accepted:
+        executor.submit(embed_resumes, [item['resume_id'] for item in uploaded], [text_content for _, text_content in accepted])
+
+    return jsonify({
+        'message': f'{len(uploaded)} of {len(files)} resumes uploaded and text extracted successfully!',
+        'uploaded': uploaded,
+        'rejected': rejected
+    }), 200 if uploaded else 400
+
 @app.route('/process_resume/<int:resume_id>', methods=['POST'])
 def process_resume(resume_id):
     """
-    Processes a stored resume using Gemini Pro for parsing and evaluation against a job description.
-    Updates the database with parsed data, score, and evaluation summary.
+    Queues a stored resume for Gemini Pro parsing and evaluation against a job description.
+    Returns 202 with a job ID straight away; poll /job/<job_id> for the result.
     """
     job_description = request.json.get('job_description', '').strip()
     if not job_description:
         return jsonify({'error': 'Job description is required for processing.'}), 400
 
     # Retrieve raw resume text from DB
-    with sqlite3.connect(DATABASE) as conn:
-        cursor = conn.cursor()
+    with db_read_lock:
+        cursor = db_read_conn.cursor()
         cursor.execute("SELECT text_content FROM resumes WHERE id = ?", (resume_id,))
         result = cursor.fetchone()
         if not result:
             return jsonify({'error': 'Resume not found in database.'}), 404
-        resume_text = result[0]
+        resume_text = decompress_text(result[0])
 
-    # --- Step 1: Parse Resume with Gemini Pro ---
-    # parse_resume_with_gemini now returns a dictionary directly, or None
-    parsed_data = parse_resume_with_gemini(resume_text)
-    if parsed_data is None: # Check if a dictionary was successfully returned (not None)
-        # The error message now reflects that the issue is within parse_resume_with_gemini
-        return jsonify({'error': 'Failed to parse resume with Gemini. Check API key, model availability, or response format.'}), 500
+    job_id = submit_job(process_resume_job, resume_id, resume_text, job_description)
+    return jsonify({
+        'message': 'Resume queued for processing.',
+        'resume_id': resume_id,
+        'job_id': job_id,
+        'status_url': f'/job/{job_id}'
+    }), 202
 
-    # Extract summary and skills for the next evaluation step
-    resume_summary = parsed_data.get('summary', 'N/A')
-    resume_skills = parsed_data.get('skills', [])
+@app.route('/process_resumes', methods=['POST'])
+def process_resumes():
+    """
+    Queues several stored resumes for evaluation against one job description with a single Gemini call.
+    Expects JSON of the form {"job_description": "...", "resume_ids": [1, 2, ...]}.
+    Returns 202 with a job ID straight away; poll /job/<job_id> for the result.
+    """
+    job_description = request.json.get('job_description', '').strip()
+    if not job_description:
+        return jsonify({'error': 'Job description is required for processing.'}), 400
 
-    # --- Step 2: Evaluate Candidate with Gemini Pro ---
-    evaluation_result = evaluate_candidate_with_gemini(job_description, resume_summary, resume_skills)
+    resume_ids = request.json.get('resume_ids', [])
+    # bool is a subclass of int, so JSON true/false would otherwise pass as IDs 1/0
+    if (not isinstance(resume_ids, list) or not resume_ids
+            or not all(isinstance(resume_id, int) and not isinstance(resume_id, bool) for resume_id in resume_ids)):
+        return jsonify({'error': 'resume_ids must be a non-empty list of resume IDs.'}), 400
+    resume_ids = list(dict.fromkeys(resume_ids)) # Drop duplicates, keep order
+
+    # Retrieve all raw resume texts from DB in one query
+    placeholders = ', '.join('?' for _ in resume_ids)
+    with db_read_lock:
+        cursor = db_read_conn.cursor()
+        cursor.execute(f"SELECT id, text_content FROM resumes WHERE id IN ({placeholders})", resume_ids)
+        resumes = [(resume_id, decompress_text(blob)) for resume_id, blob in cursor.fetchall()]
+
+    missing_ids = sorted(set(resume_ids) - {resume_id for resume_id, _ in resumes})
+    if missing_ids:
+        return jsonify({'error': f'Resumes not found in database: {missing_ids}'}), 404
+
+    job_id = submit_job(process_resumes_job, resume_ids, resumes, job_description)
+    return jsonify({
+        'message': f'{len(resume_ids)} resumes queued for processing.',
+        'job_id': job_id,
+        'status_url': f'/job/{job_id}'
+    }), 202
 
-    # Attempt to extract score (e.g., "Score: 85/100") using regex
-    score_match = re.search(r'Score:\s*(\d+)/100', evaluation_result, re.IGNORECASE)
-    score = float(score_match.group(1)) if score_match else 0.0 # Default to 0.0 if no score found
+@app.route('/rank', methods=['POST'])
+def rank_candidates():
+    """
+    Shortlists stored resumes for a job description by embedding similarity and queues a
+    full Gemini evaluation of only the closest matches.
+    Expects JSON of the form {"job_description": "...", "top_k": 10}.
+    Returns 202 with a job ID straight away; poll /job/<job_id> for the ranked result.
+    """
+    job_description = request.json.get('job_description', '').strip()
+    if not job_description:
+        return jsonify({'error': 'Job description is required for ranking.'}), 400
 
-    # Update database with parsed data, score, and full evaluation summary
-    with sqlite3.connect(DATABASE) as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE resumes SET parsed_data = ?, score = ?, job_match_summary = ? WHERE id = ?",
-            (json.dumps(parsed_data), score, evaluation_result, resume_id)
-        )
-        conn.commit()
+    top_k = request.json.get('top_k', 10)
+    # bool is a subclass of int, so JSON true/false would otherwise pass as 1/0
+    if not isinstance(top_k, int) or isinstance(top_k, bool) or not 1 <= top_k <= MAX_RANK_TOP_K:
+        return jsonify({'error': f'top_k must be an integer between 1 and {MAX_RANK_TOP_K}.'}), 400
 
+    job_id = submit_job(rank_candidates_job, job_description, top_k)
     return jsonify({
-        'message': 'Resume processed and evaluated successfully!',
-        'resume_id': resume_id,
-        'parsed_data': parsed_data,
-        'evaluation': evaluation_result,
-        'score': score
-    }), 200
+        'message': f'Ranking queued; the top {top_k} resumes will be evaluated.',
+        'job_id': job_id,
+        'status_url': f'/job/{job_id}'
+    }), 202
+
+@app.route('/job/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Reports the status of a background processing job, and its result once finished."""
+    with jobs_lock:
+        evict_finished_jobs()
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found, or its result has expired.'}), 404
+        return jsonify({'job_id': job_id, **job}), 200
+
+# Number of candidate rows fetched from SQLite per chunk while streaming /candidates
+CANDIDATES_FETCH_SIZE = 100
 
 @app.route('/candidates', methods=['GET'])
 def get_candidates():
-    """Fetches all processed candidates from the database, ordered by score."""
-    with sqlite3.connect(DATABASE) as conn:
+    """
+    Streams all processed candidates from the database as a JSON array, ordered by score.
+    Rows are fetched and serialized a chunk at a time, so the full list is never held in memory.
+    The stream reads through its own connection, so its open SELECT doesn't hold back the
+    snapshot seen by other readers of db_read_conn while a slow client downloads the list.
+    """
+    def generate():
+        conn = connect_read_only()
         cursor = conn.cursor()
-        # Select relevant fields for the candidate list display
-        cursor.execute("SELECT id, filename, parsed_data, score, job_match_summary FROM resumes ORDER BY score DESC")
-        candidates_raw = cursor.fetchall()
-
-        candidates = []
-        for candidate_id, filename, parsed_data_json, score, job_match_summary in candidates_raw:
-            parsed_data = json.loads(parsed_data_json) if parsed_data_json else {}
-            candidates.append({
-                'id': candidate_id,
-                'filename': filename,
-                'name': parsed_data.get('name', 'N/A'),
-                'email': parsed_data.get('email', 'N/A'),
-                'score': score,
-                'job_match_summary': job_match_summary # Include summary for quick list view if desired
-            })
-    return jsonify(candidates), 200
+        try:
+            # Select relevant fields for the candidate list display; name/email have their own
+            # columns so the (potentially large) parsed_data JSON isn't decoded for every row
+            cursor.execute("SELECT id, filename, name, email, score, job_match_summary FROM resumes ORDER BY score DESC")
+            yield b'['
+            first = True
+            while True:
+                rows = cursor.fetchmany(CANDIDATES_FETCH_SIZE)
+                if not rows:
+                    break
+                for candidate_id, filename, name, email, score, job_match_summary in rows:
+                    candidate = orjson.dumps({
+                        'id': candidate_id,
+                        'filename': filename,
+                        'name': name or 'N/A',
+                        'email': email or 'N/A',
+                        'score': score,
+                        'job_match_summary': job_match_summary # Include summary for quick list view if desired
+                    })
+                    yield candidate if first else b',' + candidate
+                    first = False
+            yield b']'
+        finally:
+            conn.close()
+
+    return Response(generate(), mimetype='application/json')
 
 @app.route('/candidate_details/<int:resume_id>', methods=['GET'])
 def get_candidate_details(resume_id):
     """Fetches detailed information for a specific candidate."""
-    with sqlite3.connect(DATABASE) as conn:
-        cursor = conn.cursor()
+    with db_read_lock:
+        cursor = db_read_conn.cursor()
         cursor.execute("SELECT filename, parsed_data, score, job_match_summary FROM resumes WHERE id = ?", (resume_id,))
         result = cursor.fetchone()
         if not result:
             return jsonify({'error': 'Candidate not found.'}), 404
 
         filename, parsed_data_json, score, job_match_summary = result
-        parsed_data = json.loads(parsed_data_json) if parsed_data_json else {}
+        parsed_data = orjson.loads(parsed_data_json) if parsed_data_json else {}
 
         return jsonify({
             'id': resume_id,
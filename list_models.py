@@ -1,14 +1,40 @@
 import os
+import json
+import time
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-# Load your API key from .env
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Model list is cached here so repeated runs don't hit the Gemini API every time
+CACHE_PATH = '.models_cache.json'
+CACHE_TTL_SECONDS = 24 * 60 * 60 # Refresh the cached list once a day
+
+def fetch_models():
+    """Fetches the available models from the Gemini API as a list of {name, supports_generate_content} dicts."""
+    # Imported here so cached runs skip loading the Gemini SDK entirely
+    import google.generativeai as genai
+
+    # Load your API key from .env
+    load_dotenv()
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+
+    return [
+        {'name': m.name, 'supports_generate_content': "generateContent" in m.supported_generation_methods}
+        for m in genai.list_models()
+    ]
+
+def load_models():
+    """Returns the cached model list if it is fresh enough, otherwise fetches and caches it."""
+    if os.path.exists(CACHE_PATH) and time.time() - os.path.getmtime(CACHE_PATH) < CACHE_TTL_SECONDS:
+        with open(CACHE_PATH) as f:
+            return json.load(f)
+
+    models = fetch_models()
+    with open(CACHE_PATH, 'w') as f:
+        json.dump(models, f)
+    return models
 
 print("Available Gemini Models:")
-for m in genai.list_models():
-    if "generateContent" in m.supported_generation_methods:
-        print(f"- {m.name} (supported for generateContent)")
+for m in load_models():
+    if m['supports_generate_content']:
+        print(f"- {m['name']} (supported for generateContent)")
     else:
-        print(f"- {m.name} (NOT supported for generateContent)")
\ No newline at end of file
+        print(f"- {m['name']} (NOT supported for generateContent)")
\ No newline at end of file